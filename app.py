@@ -1,11 +1,14 @@
-from flask import Flask, jsonify, request, redirect, url_for
+from flask import Flask, jsonify, request, redirect, url_for, abort, g, has_request_context
 import os
+import hmac
 import logging
 import json
 import time
 from datetime import datetime
 from werkzeug.exceptions import HTTPException
 from config import config
+from instrumentation import RuntimeInstrumentation
+from server import serve
 from flask_talisman import Talisman
 import ssl
 
@@ -47,15 +50,35 @@ class JSONFormatter(logging.Formatter):
             log_entry['port'] = record.port
         if hasattr(record, 'environment'):
             log_entry['environment'] = record.environment
+        if hasattr(record, 'server_mode'):
+            log_entry['server_mode'] = record.server_mode
+        if hasattr(record, 'socket_path'):
+            log_entry['socket_path'] = record.socket_path
+        if hasattr(record, 'workers'):
+            log_entry['workers'] = record.workers
+        if hasattr(record, 'pid'):
+            log_entry['pid'] = record.pid
+        if hasattr(record, 'exit_code'):
+            log_entry['exit_code'] = record.exit_code
+        if hasattr(record, 'routes'):
+            log_entry['routes'] = record.routes
             
         return json.dumps(log_entry)
 
+class BatchLogFilter(logging.Filter):
+    """Drop per-handler INFO records while a batch request runs its handlers"""
+    def filter(self, record):
+        if record.levelno > logging.INFO or not has_request_context():
+            return True
+        return not g.get('in_batch', False)
+
 logger = logging.getLogger()
 logger.handlers.clear()  # Clear any existing handlers
 logHandler = logging.StreamHandler()
 formatter = JSONFormatter()
 logHandler.setFormatter(formatter)
 logger.addHandler(logHandler)
+logger.addFilter(BatchLogFilter())
 logger.setLevel(getattr(logging, app_config.LOG_LEVEL))
 
 app = Flask(__name__)
@@ -79,6 +102,11 @@ if HTTPS_ENABLED:
 
 FORCE_HTTPS = HTTPS_ENABLED and app_config.ENVIRONMENT == 'production'
 
+# Runtime instrumentation (RSS, GC pauses, threads, file descriptors)
+runtime_instrumentation = RuntimeInstrumentation(tracemalloc_frames=app_config.TRACEMALLOC_FRAMES)
+if app_config.INSTRUMENTATION_ENABLED:
+    runtime_instrumentation.install()
+
 # Configure security headers based on environment
 if app_config.ENVIRONMENT == 'production':
     # Production: Strict security headers
@@ -177,7 +205,68 @@ def health_check():
 def metrics():
     """Basic metrics endpoint"""
     logger.info('Metrics endpoint called')
-    return jsonify(app_config.get_metrics_response())
+    response = app_config.get_metrics_response()
+    if app_config.INSTRUMENTATION_ENABLED:
+        response['runtime'] = runtime_instrumentation.collect()
+    return jsonify(response)
+
+def require_instrumentation_token():
+    """Abort unless the request carries the configured instrumentation token"""
+    token = app_config.INSTRUMENTATION_TOKEN
+    if not app_config.INSTRUMENTATION_ENABLED or not token:
+        abort(404)
+    supplied = request.headers.get('X-Instrumentation-Token', '')
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        logger.warning('Rejected instrumentation request', extra={
+            'path': request.path,
+            'remote_addr': request.remote_addr
+        })
+        abort(403)
+
+# Bounds for the number of tracemalloc statistics returned per response
+TRACEMALLOC_LIMIT_MIN = 1
+TRACEMALLOC_LIMIT_MAX = 100
+
+def get_tracemalloc_limit():
+    """Read the ``limit`` query parameter, rejecting values outside the allowed range"""
+    limit = request.args.get('limit', 10, type=int)
+    if not TRACEMALLOC_LIMIT_MIN <= limit <= TRACEMALLOC_LIMIT_MAX:
+        abort(400, description=f'limit must be between {TRACEMALLOC_LIMIT_MIN} and {TRACEMALLOC_LIMIT_MAX}')
+    return limit
+
+@app.route('/debug/tracemalloc/snapshots', methods=['POST'])
+def tracemalloc_snapshot():
+    """Take a tracemalloc snapshot (starts tracing on first call)"""
+    require_instrumentation_token()
+    limit = get_tracemalloc_limit()
+    logger.info('Tracemalloc snapshot requested')
+    return jsonify(runtime_instrumentation.take_snapshot(limit=limit)), 201
+
+@app.route('/debug/tracemalloc/diff')
+def tracemalloc_diff():
+    """Compare two tracemalloc snapshots by id (owned by this worker process)"""
+    require_instrumentation_token()
+    start = request.args.get('start')
+    end = request.args.get('end')
+    limit = get_tracemalloc_limit()
+    if start is None or end is None:
+        abort(400, description='Both start and end snapshot ids are required')
+    logger.info('Tracemalloc diff requested')
+    try:
+        return jsonify(runtime_instrumentation.diff_snapshots(start, end, limit=limit))
+    except KeyError:
+        abort(404, description='Unknown snapshot id for this worker process')
+
+@app.route('/debug/tracemalloc', methods=['DELETE'])
+def tracemalloc_stop():
+    """Stop tracemalloc and discard stored snapshots"""
+    require_instrumentation_token()
+    logger.info('Tracemalloc stop requested')
+    runtime_instrumentation.stop_tracing()
+    return jsonify({
+        'tracing': False,
+        'timestamp': datetime.utcnow().isoformat()
+    })
 
 @app.route('/config')
 def get_config():
@@ -244,13 +333,61 @@ def force_https_test():
         'timestamp': datetime.utcnow().isoformat()
     })
 
+# Read-only JSON routes that can be combined in a single /batch request
+BATCH_ROUTES = ('/health', '/metrics', '/config', '/security-headers', '/ssl-status')
+
+def run_batched_route(adapter, path):
+    """Run the view function for a path in the current request context"""
+    try:
+        endpoint, view_args = adapter.match(path, method='GET')
+        response = app.make_response(app.view_functions[endpoint](**view_args))
+    except HTTPException as e:
+        return {
+            'status_code': e.code,
+            'error': e.description
+        }
+
+    payload = response.get_json()
+    if isinstance(payload, dict):
+        payload.pop('timestamp', None)
+    return {
+        'status_code': response.status_code,
+        'data': payload
+    }
+
+@app.route('/batch')
+def batch_status():
+    """Return several read-only endpoints in one response"""
+    routes = request.args.getlist('routes')
+    routes = [route.strip() for value in routes for route in value.split(',') if route.strip()]
+    routes = ['/' + route.lstrip('/') for route in routes] or list(BATCH_ROUTES)
+
+    unsupported = [route for route in routes if route not in BATCH_ROUTES]
+    if unsupported:
+        abort(400, description=f'Unsupported batch routes: {", ".join(unsupported)}')
+
+    logger.info('Batch status requested', extra={'routes': routes})
+
+    adapter = app.url_map.bind_to_environ(request.environ)
+    g.in_batch = True
+    try:
+        results = {route: run_batched_route(adapter, route) for route in routes}
+    finally:
+        g.in_batch = False
+
+    return jsonify({
+        'results': results,
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
 if __name__ == '__main__':
     logger.info('Starting Flask application', extra={
         'port': app_config.PORT,
         'environment': app_config.ENVIRONMENT,
         'app_name': app_config.APP_NAME,
         'version': app_config.APP_VERSION,
-        'https_enabled': HTTPS_ENABLED
+        'https_enabled': HTTPS_ENABLED,
+        'server_mode': app_config.SERVER_MODE
     })
     
     if HTTPS_ENABLED and SSL_CERT_PATH and SSL_KEY_PATH:
@@ -263,14 +400,14 @@ if __name__ == '__main__':
             'key_path': SSL_KEY_PATH
         })
         
-        app.run(
-            host=app_config.HOST, 
+        serve(
+            app,
+            app_config,
             port=443,  # Use standard HTTPS port
-            debug=app_config.DEBUG,
             ssl_context=context
         )
     else:
         # Run without SSL
         logger.info('Starting Flask app with HTTP')
-        app.run(host=app_config.HOST, port=app_config.PORT, debug=app_config.DEBUG)
+        serve(app, app_config)
 
@@ -0,0 +1,87 @@
+"""Compare one /batch poll against separate calls to each status endpoint.
+
+Each scenario runs against its own forked server on loopback TCP so the
+server's CPU time can be read from its rusage when it exits. Log output is
+kept (written to /dev/null) because logging is part of the per-request cost.
+
+Usage: python benchmarks/bench_batch.py [polls]
+"""
+import http.client
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'production')
+
+from app import app
+from server import create_reuseport_listener, serve_socket
+
+ROUTES = ['/health', '/metrics', '/config', '/ssl-status']
+
+def start_server():
+    sock = create_reuseport_listener('127.0.0.1', 0)
+    port = sock.getsockname()[1]
+    pid = os.fork()
+    if pid == 0:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 2)
+        try:
+            serve_socket(app, sock, '127.0.0.1', port)
+        finally:
+            os._exit(0)
+    sock.close()
+    return pid, port
+
+def get(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    assert response.status == 200, (path, response.status)
+    return body
+
+def run(name, paths, polls):
+    pid, port = start_server()
+    for path in paths:
+        get(port, path)  # warm up
+
+    latencies = []
+    transferred = 0
+    for _ in range(polls):
+        start = time.perf_counter()
+        for path in paths:
+            transferred += len(get(port, path))
+        latencies.append(time.perf_counter() - start)
+
+    os.kill(pid, signal.SIGTERM)
+    _, _, usage = os.wait4(pid, 0)
+    cpu = usage.ru_utime + usage.ru_stime
+
+    latencies.sort()
+    result = {
+        'round_trips': len(paths),
+        'poll_ms': sum(latencies) / polls * 1000,
+        'p99_ms': latencies[int(polls * 0.99) - 1] * 1000,
+        'server_cpu_ms': cpu / (polls + 1) * 1000,
+        'bytes': transferred / polls,
+    }
+    print(f"{name:<10} {result['round_trips']:>11} {result['poll_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+          f"{result['server_cpu_ms']:>14.3f} {result['bytes']:>9.0f}")
+    return result
+
+def main():
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print(f'{polls} polls of {", ".join(ROUTES)}')
+    print(f"{'mode':<10} {'round trips':>11} {'poll ms':>9} {'p99 ms':>9} {'server cpu ms':>14} {'bytes':>9}")
+    separate = run('separate', ROUTES, polls)
+    batched = run('batch', ['/batch?routes=' + ','.join(ROUTES)], polls)
+
+    print(f"batch vs separate: {batched['poll_ms'] / separate['poll_ms'] - 1:+.1%} poll time, "
+          f"{batched['server_cpu_ms'] / separate['server_cpu_ms'] - 1:+.1%} server CPU")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Measure the overhead of keeping runtime instrumentation enabled.
+
+Baseline, instrumented and tracemalloc runs are interleaved so drift in
+machine load affects all of them equally. Each overhead is reported as the
+median of the per-repeat ratios against the baseline run of the same
+repeat, with the min..max spread across repeats.
+
+Usage: python benchmarks/bench_instrumentation.py [rounds] [repeats]
+"""
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrumentation import RuntimeInstrumentation
+
+def allocation_workload(rounds):
+    """Allocation-heavy loop that triggers many generation-0 collections"""
+    for _ in range(rounds):
+        nodes = [[i] for i in range(1000)]
+        for node in nodes:
+            node.append(node)
+
+def time_workload(rounds):
+    gc.collect()
+    start = time.perf_counter()
+    allocation_workload(rounds)
+    return time.perf_counter() - start
+
+def summarise(ratios):
+    percentages = [(ratio - 1) * 100 for ratio in ratios]
+    return statistics.median(percentages), min(percentages), max(percentages)
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 11
+    instrumentation = RuntimeInstrumentation()
+
+    allocation_workload(rounds // 10)  # warm up
+    baseline_times = []
+    callback_ratios = []
+    tracemalloc_ratios = []
+    for _ in range(repeats):
+        instrumentation.uninstall()
+        baseline = time_workload(rounds)
+
+        instrumentation.install()
+        instrumented = time_workload(rounds)
+        instrumentation.uninstall()
+
+        tracemalloc.start(1)
+        traced = time_workload(rounds)
+        tracemalloc.stop()
+
+        baseline_times.append(baseline)
+        callback_ratios.append(instrumented / baseline)
+        tracemalloc_ratios.append(traced / baseline)
+
+    collections = sum(g['collections'] for g in instrumentation.collect()['gc']['generations'])
+
+    info = {'generation': 0, 'collected': 0, 'uncollectable': 0}
+    callback_iterations = 100000
+    start = time.perf_counter()
+    for _ in range(callback_iterations):
+        instrumentation._gc_callback('start', info)
+        instrumentation._gc_callback('stop', info)
+    callback_cost = (time.perf_counter() - start) / callback_iterations
+
+    collect_iterations = 1000
+    start = time.perf_counter()
+    for _ in range(collect_iterations):
+        instrumentation.collect()
+    collect_cost = (time.perf_counter() - start) / collect_iterations
+
+    print(f'workload rounds:          {rounds} x {repeats} interleaved repeats')
+    print(f'gc collections per run:   {collections // repeats}')
+    print(f'baseline (median):        {statistics.median(baseline_times) * 1000:.2f} ms')
+    print('with gc callback:         {:+.2f}% median ({:+.2f}% .. {:+.2f}%)'.format(*summarise(callback_ratios)))
+    print('with tracemalloc:         {:+.2f}% median ({:+.2f}% .. {:+.2f}%)'.format(*summarise(tracemalloc_ratios)))
+    print(f'callback per collection:  {callback_cost * 1e9:.0f} ns')
+    print(f'collect() per call:       {collect_cost * 1e6:.1f} us')
+
+if __name__ == '__main__':
+    main()
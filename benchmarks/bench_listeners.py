@@ -0,0 +1,116 @@
+"""Compare loopback TCP against a Unix domain socket for the proxy -> app hop.
+
+The client plays the role of nginx: one short-lived upstream connection per
+request (nginx's default without ``keepalive`` in the upstream block), with
+several requests in flight at once.
+
+Usage: python benchmarks/bench_listeners.py [requests] [concurrency]
+"""
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('FLASK_ENV', 'testing')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from app import app
+from server import create_reuseport_listener, create_unix_listener, serve_socket
+
+REQUEST = b'GET /health HTTP/1.0\r\nHost: localhost\r\nX-Forwarded-For: 127.0.0.1\r\n\r\n'
+
+def start_server(sock, host, port):
+    """Fork a server process for the listener and return its pid"""
+    pid = os.fork()
+    if pid == 0:
+        logging.getLogger().setLevel(logging.WARNING)
+        try:
+            serve_socket(app, sock, host, port)
+        finally:
+            os._exit(0)
+    sock.close()
+    return pid
+
+def run_client(connect, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker():
+        local = []
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    break
+                remaining[0] -= 1
+            start = time.perf_counter()
+            conn = connect()
+            conn.sendall(REQUEST)
+            while conn.recv(65536):
+                pass
+            conn.close()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+def bench(name, sock, host, port, connect, total, concurrency):
+    pid = start_server(sock, host, port)
+    try:
+        run_client(connect, min(total, 200), concurrency)  # warm up
+        result = run_client(connect, total, concurrency)
+    finally:
+        os.kill(pid, 15)
+        os.waitpid(pid, 0)
+    print(f"{name:<14} {result['rps']:>9.0f} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f}")
+    return result
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print(f'{total} requests, concurrency {concurrency}')
+    print(f"{'transport':<14} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+    tcp = create_reuseport_listener('127.0.0.1', 0)
+    port = tcp.getsockname()[1]
+    tcp_result = bench(
+        'loopback TCP', tcp, '127.0.0.1', port,
+        lambda: socket.create_connection(('127.0.0.1', port)),
+        total, concurrency
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'app.sock')
+        uds = create_unix_listener(path)
+
+        def connect_uds():
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(path)
+            return conn
+
+        uds_result = bench('unix socket', uds, f'unix://{path}', 0, connect_uds, total, concurrency)
+
+    print(f"UDS vs TCP: {uds_result['rps'] / tcp_result['rps'] - 1:+.1%} req/s, "
+          f"{uds_result['p50_ms'] / tcp_result['p50_ms'] - 1:+.1%} p50 latency")
+
+if __name__ == '__main__':
+    main()
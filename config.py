@@ -1,6 +1,12 @@
 import os
 from datetime import datetime
 
+def default_worker_count():
+    """CPUs this process may run on (honours cpusets, unlike os.cpu_count())"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 class Config:
     """Base configuration class"""
     APP_NAME = os.environ.get('APP_NAME', 'flask-app')
@@ -11,6 +17,15 @@ class Config:
     HOST = os.environ.get('HOST', '0.0.0.0')
     PORT = int(os.environ.get('PORT', 8080))
     
+    # Listener configuration: 'tcp' (single listener), 'unix' (Unix domain
+    # socket shared with the proxy) or 'reuseport' (one SO_REUSEPORT
+    # listener per worker process)
+    SERVER_MODE = os.environ.get('SERVER_MODE', 'tcp').lower()
+    UNIX_SOCKET_PATH = os.environ.get('UNIX_SOCKET_PATH', '/run/flask-app/app.sock')
+    UNIX_SOCKET_MODE = int(os.environ.get('UNIX_SOCKET_MODE', '660'), 8)
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', default_worker_count()))
+    LISTEN_BACKLOG = int(os.environ.get('LISTEN_BACKLOG', 128))
+    
     # Feature flags
     HEALTH_CHECK_ENABLED = os.environ.get('HEALTH_CHECK_ENABLED', 'true').lower() == 'true'
     CORS_ENABLED = os.environ.get('CORS_ENABLED', 'false').lower() == 'true'
@@ -20,6 +35,12 @@ class Config:
     SSL_CERT_PATH = os.environ.get('SSL_CERT_PATH', None)
     SSL_KEY_PATH = os.environ.get('SSL_KEY_PATH', None)
     
+    # Runtime instrumentation
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    # Debug endpoints (tracemalloc) are disabled unless a token is configured
+    INSTRUMENTATION_TOKEN = os.environ.get('INSTRUMENTATION_TOKEN', None)
+    TRACEMALLOC_FRAMES = int(os.environ.get('TRACEMALLOC_FRAMES', 1))
+    
     def get_health_response(self):
         """Generate health check response"""
         return {
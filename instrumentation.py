@@ -0,0 +1,217 @@
+import functools
+import gc
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+
+class RuntimeInstrumentation:
+    """Process memory, GC and resource instrumentation.
+
+    GC pauses are timed through ``gc.callbacks``; everything else is read
+    on demand when ``collect()`` is called, so the steady-state cost is one
+    ``perf_counter()`` pair per garbage collection.
+    """
+
+    def __init__(self, tracemalloc_frames=1, max_snapshots=10):
+        if tracemalloc_frames < 1:
+            raise ValueError(f'TRACEMALLOC_FRAMES must be at least 1, got {tracemalloc_frames}')
+        self.tracemalloc_frames = tracemalloc_frames
+        self.max_snapshots = max_snapshots
+        self._installed = False
+        self._reset()
+
+        # Forked workers (SERVER_MODE=reuseport) start with their own counters
+        # instead of reporting the parent's pre-fork numbers under their pid
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=functools.partial(_reset_after_fork, weakref.ref(self)))
+
+    def _reset(self):
+        """Start counters, uptime and the snapshot store from zero"""
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._gc_start = None
+        self._gc_collections = [0] * 3
+        self._gc_collected = [0] * 3
+        self._gc_pause_total = [0.0] * 3
+        self._gc_pause_max = [0.0] * 3
+        self._gc_last_pause = 0.0
+        self._snapshots = OrderedDict()
+        self._snapshot_seq = 0
+
+    def install(self):
+        """Register the GC callback (idempotent)"""
+        if not self._installed:
+            gc.callbacks.append(self._gc_callback)
+            self._installed = True
+
+    def uninstall(self):
+        """Remove the GC callback"""
+        if self._installed:
+            gc.callbacks.remove(self._gc_callback)
+            self._installed = False
+
+    def _gc_callback(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+            return
+        if self._gc_start is None:
+            return
+        pause = time.perf_counter() - self._gc_start
+        self._gc_start = None
+        generation = info.get('generation', 0)
+        self._gc_collections[generation] += 1
+        self._gc_collected[generation] += info.get('collected', 0)
+        self._gc_pause_total[generation] += pause
+        if pause > self._gc_pause_max[generation]:
+            self._gc_pause_max[generation] = pause
+        self._gc_last_pause = pause
+
+    def collect(self):
+        """Return a JSON-serialisable view of the current runtime state"""
+        counts = gc.get_count()
+        generations = []
+        for generation in range(3):
+            collections = self._gc_collections[generation]
+            pause_total = self._gc_pause_total[generation]
+            generations.append({
+                'generation': generation,
+                'collections': collections,
+                'collected': self._gc_collected[generation],
+                'pending_allocations': counts[generation],
+                'pause_total_ms': round(pause_total * 1000, 3),
+                'pause_max_ms': round(self._gc_pause_max[generation] * 1000, 3),
+                'pause_avg_ms': round(pause_total * 1000 / collections, 3) if collections else 0.0,
+            })
+
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+            'rss_bytes': get_rss_bytes(),
+            'threads': threading.active_count(),
+            'open_fds': get_open_fd_count(),
+            'gc': {
+                'enabled': gc.isenabled(),
+                'thresholds': list(gc.get_threshold()),
+                'last_pause_ms': round(self._gc_last_pause * 1000, 3),
+                'generations': generations,
+            },
+            'tracemalloc': {
+                'tracing': tracemalloc.is_tracing(),
+                'snapshots': list(self._snapshots.keys()),
+            },
+        }
+
+    def take_snapshot(self, limit=10):
+        """Take a tracemalloc snapshot, starting tracing on first use"""
+        # Hold the lock so a concurrent stop_tracing() cannot stop tracing
+        # between the start and the snapshot
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.tracemalloc_frames)
+
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+
+            self._snapshot_seq += 1
+            # Prefix with the pid so ids stay unique across forked workers
+            snapshot_id = f'{os.getpid()}-{self._snapshot_seq}'
+            self._snapshots[snapshot_id] = snapshot
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+
+        return {
+            'snapshot_id': snapshot_id,
+            'traced_current_bytes': current,
+            'traced_peak_bytes': peak,
+            'top': [_format_stat(stat) for stat in snapshot.statistics('lineno')[:limit]],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    def diff_snapshots(self, start_id, end_id, limit=10):
+        """Compare two stored snapshots; raises KeyError for unknown ids
+
+        Ids created by another process (a different reuseport worker, or the
+        parent before forking) are treated as unknown.
+        """
+        owner = f'{os.getpid()}-'
+        for snapshot_id in (start_id, end_id):
+            if not snapshot_id.startswith(owner):
+                raise KeyError(snapshot_id)
+
+        with self._lock:
+            start = self._snapshots[start_id]
+            end = self._snapshots[end_id]
+
+        stats = end.compare_to(start, 'lineno')
+        return {
+            'start': start_id,
+            'end': end_id,
+            'size_diff_bytes': sum(stat.size_diff for stat in stats),
+            'count_diff': sum(stat.count_diff for stat in stats),
+            'top': [_format_stat_diff(stat) for stat in stats[:limit]],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    def stop_tracing(self):
+        """Stop tracemalloc and drop stored snapshots"""
+        with self._lock:
+            self._snapshots.clear()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+def _reset_after_fork(ref):
+    instrumentation = ref()
+    if instrumentation is not None:
+        instrumentation._reset()
+
+def get_rss_bytes():
+    """Current resident set size, or peak RSS where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        import sys
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+    except (ImportError, OSError):
+        return None
+
+def get_open_fd_count():
+    """Number of open file descriptors, or None if it cannot be determined"""
+    for fd_dir in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+def _format_frame(stat):
+    frame = stat.traceback[0]
+    return f'{frame.filename}:{frame.lineno}'
+
+def _format_stat(stat):
+    return {
+        'location': _format_frame(stat),
+        'size_bytes': stat.size,
+        'count': stat.count,
+    }
+
+def _format_stat_diff(stat):
+    return {
+        'location': _format_frame(stat),
+        'size_bytes': stat.size,
+        'size_diff_bytes': stat.size_diff,
+        'count': stat.count,
+        'count_diff': stat.count_diff,
+    }
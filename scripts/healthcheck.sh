@@ -3,6 +3,16 @@
 # Health check script for Flask application
 # This script checks if the application is responding on the appropriate port
 
+# Unix socket mode - check through the socket shared with nginx
+if [ "$SERVER_MODE" = "unix" ]; then
+    if curl -f --unix-socket "${UNIX_SOCKET_PATH:-/run/flask-app/app.sock}" http://localhost/health > /dev/null 2>&1; then
+        exit 0
+    else
+        echo "Unix socket health check failed"
+        exit 1
+    fi
+fi
+
 # Check if HTTPS is enabled by looking for SSL certificates
 if [ -f "/app/cert.pem" ] && [ -f "/app/key.pem" ]; then
     # HTTPS mode - check port 443
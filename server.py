@@ -0,0 +1,205 @@
+import logging
+import os
+import signal
+import socket
+import stat
+from werkzeug.serving import make_server
+
+logger = logging.getLogger(__name__)
+
+SERVER_MODES = ('tcp', 'unix', 'reuseport')
+
+def remove_stale_unix_socket(path):
+    """Unlink a socket file left behind by a dead server
+
+    Raises ``FileExistsError`` if the path is not a socket, or if another
+    server is still accepting connections on it.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise FileExistsError(f'{path} exists and is not a Unix socket')
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f'{path} is in use by a running server')
+
+def create_unix_listener(path, mode=0o660, backlog=128):
+    """Bind a listening Unix domain socket, replacing a stale socket file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    remove_stale_unix_socket(path)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(path)
+        # Let the proxy (a different user in another container) connect
+        os.chmod(path, mode)
+        sock.listen(backlog)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+def create_reuseport_listener(host, port, backlog=128):
+    """Bind a listening TCP socket with SO_REUSEPORT set"""
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError('SO_REUSEPORT is not supported on this platform')
+
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+def make_socket_server(app, sock, host, port, ssl_context=None):
+    """Create a threaded WSGI server on an already bound and listening socket"""
+    return make_server(
+        host,
+        port,
+        app,
+        threaded=True,
+        ssl_context=ssl_context,
+        fd=sock.fileno()
+    )
+
+def serve_socket(app, sock, host, port, ssl_context=None):
+    """Serve the WSGI app on an already bound and listening socket"""
+    make_socket_server(app, sock, host, port, ssl_context=ssl_context).serve_forever()
+
+def serve_reuseport(app, host, port, workers, backlog=128, ssl_context=None):
+    """Fork one worker per SO_REUSEPORT listener and wait for them to exit
+
+    If a worker crashes (non-zero exit or killed by a signal it was not sent
+    during shutdown), the remaining workers are stopped and ``RuntimeError``
+    is raised so the process exits non-zero and the supervisor restarts it.
+    """
+    # Bind every listener up front so a port conflict fails before forking
+    listeners = [create_reuseport_listener(host, port, backlog) for _ in range(workers)]
+    children = []
+
+    for sock in listeners:
+        pid = os.fork()
+        if pid == 0:
+            # Keep only this worker's listener so the kernel balances across processes
+            for other in listeners:
+                if other is not sock:
+                    other.close()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            status = 0
+            try:
+                serve_socket(app, sock, host, port, ssl_context=ssl_context)
+            except BaseException as e:
+                logger.error('SO_REUSEPORT worker crashed', extra={
+                    'port': port,
+                    'pid': os.getpid(),
+                    'exception_type': type(e).__name__,
+                    'exception_message': str(e)
+                })
+                status = 1
+            finally:
+                os._exit(status)
+        children.append(pid)
+        logger.info('Started SO_REUSEPORT worker', extra={'port': port, 'pid': pid})
+
+    for sock in listeners:
+        sock.close()
+
+    stopping = False
+
+    def stop_workers(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous_handlers = {
+        signum: signal.signal(signum, stop_workers)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+
+    failed = None
+    try:
+        while children:
+            try:
+                pid, wait_status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            if pid not in children:
+                continue
+            children.remove(pid)
+
+            exit_code = os.waitstatus_to_exitcode(wait_status)
+            if exit_code == 0 or (stopping and exit_code == -signal.SIGTERM):
+                logger.info('SO_REUSEPORT worker exited', extra={'port': port, 'pid': pid})
+                continue
+
+            logger.error('SO_REUSEPORT worker failed', extra={
+                'port': port,
+                'pid': pid,
+                'exit_code': exit_code
+            })
+            if failed is None:
+                failed = (pid, exit_code)
+                stop_workers()
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    if failed is not None:
+        pid, exit_code = failed
+        raise RuntimeError(f'SO_REUSEPORT worker {pid} failed with exit code {exit_code}')
+
+def serve(app, app_config, host=None, port=None, ssl_context=None):
+    """Run the app using the listener selected by ``app_config.SERVER_MODE``"""
+    host = host if host is not None else app_config.HOST
+    port = port if port is not None else app_config.PORT
+    mode = app_config.SERVER_MODE
+
+    if mode not in SERVER_MODES:
+        raise ValueError(f'Unknown SERVER_MODE {mode!r}, expected one of {", ".join(SERVER_MODES)}')
+
+    if mode == 'unix':
+        path = app_config.UNIX_SOCKET_PATH
+        sock = create_unix_listener(path, app_config.UNIX_SOCKET_MODE, app_config.LISTEN_BACKLOG)
+        logger.info('Starting Flask app on Unix socket', extra={'socket_path': path})
+        try:
+            serve_socket(app, sock, f'unix://{path}', 0, ssl_context=ssl_context)
+        finally:
+            sock.close()
+            if os.path.exists(path):
+                os.unlink(path)
+    elif mode == 'reuseport':
+        logger.info('Starting Flask app with SO_REUSEPORT workers', extra={
+            'port': port,
+            'workers': app_config.SERVER_WORKERS
+        })
+        serve_reuseport(
+            app,
+            host,
+            port,
+            app_config.SERVER_WORKERS,
+            backlog=app_config.LISTEN_BACKLOG,
+            ssl_context=ssl_context
+        )
+    else:
+        app.run(host=host, port=port, debug=app_config.DEBUG, ssl_context=ssl_context)
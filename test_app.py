@@ -1,6 +1,11 @@
 import unittest
 import json
 import os
+import signal
+import socket
+import tempfile
+import threading
+from unittest import mock
 
 # Set test environment variables BEFORE importing app
 os.environ['FLASK_ENV'] = 'testing'
@@ -8,7 +13,9 @@ os.environ['APP_NAME'] = 'test-app'
 os.environ['APP_VERSION'] = '1.0.0-test'
 os.environ['HTTPS_ENABLED'] = 'false'
 
-from app import app
+from app import app, app_config, runtime_instrumentation
+from instrumentation import RuntimeInstrumentation
+from server import create_reuseport_listener, create_unix_listener, make_socket_server, serve, serve_reuseport
 
 class FlaskAppTestCase(unittest.TestCase):
     def setUp(self):
@@ -362,5 +369,397 @@ class FlaskAppTestCase(unittest.TestCase):
         self.assertFalse(data['https_enabled'])
         self.assertFalse(data['force_https'])
 
+class RuntimeInstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        patcher = mock.patch.object(app_config, 'INSTRUMENTATION_TOKEN', 'secret-token')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(runtime_instrumentation.stop_tracing)
+        self.headers = {'X-Instrumentation-Token': 'secret-token'}
+
+    def test_metrics_runtime_section(self):
+        """Test that metrics include runtime instrumentation"""
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+
+        runtime = json.loads(response.data)['runtime']
+        self.assertEqual(runtime['pid'], os.getpid())
+        self.assertGreater(runtime['rss_bytes'], 0)
+        self.assertGreaterEqual(runtime['threads'], 1)
+        self.assertIn('open_fds', runtime)
+        self.assertIn('uptime_seconds', runtime)
+        self.assertEqual(len(runtime['gc']['generations']), 3)
+        for generation in runtime['gc']['generations']:
+            self.assertIn('collections', generation)
+            self.assertIn('pause_total_ms', generation)
+            self.assertIn('pause_max_ms', generation)
+
+    def test_gc_pauses_are_recorded(self):
+        """Test that an explicit collection is counted by the GC callback"""
+        before = runtime_instrumentation.collect()['gc']['generations'][2]['collections']
+        import gc
+        gc.collect()
+        after = runtime_instrumentation.collect()['gc']['generations'][2]['collections']
+        self.assertGreater(after, before)
+
+    def test_forked_child_starts_from_zero(self):
+        """Test that a forked worker does not inherit the parent's counters"""
+        import gc
+        for _ in range(5):
+            gc.collect()
+        self.app.post('/debug/tracemalloc/snapshots', headers=self.headers)
+        parent = runtime_instrumentation.collect()
+        self.assertGreaterEqual(parent['gc']['generations'][2]['collections'], 5)
+
+        read_fd, write_fd = os.pipe()
+        # Keep the child from collecting before it reports its counters
+        self.addCleanup(gc.enable)
+        gc.disable()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                with os.fdopen(write_fd, 'w') as pipe:
+                    json.dump(runtime_instrumentation.collect(), pipe)
+            finally:
+                os._exit(0)
+
+        gc.enable()
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            child = json.load(pipe)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(child['pid'], pid)
+        self.assertLess(child['uptime_seconds'], parent['uptime_seconds'])
+        self.assertEqual(child['gc']['last_pause_ms'], 0.0)
+        self.assertEqual(child['tracemalloc']['snapshots'], [])
+        for generation in child['gc']['generations']:
+            self.assertEqual(generation['collections'], 0)
+            self.assertEqual(generation['collected'], 0)
+            self.assertEqual(generation['pause_total_ms'], 0.0)
+            self.assertEqual(generation['pause_max_ms'], 0.0)
+
+    def test_tracemalloc_requires_token(self):
+        """Test that tracemalloc endpoints reject missing or wrong tokens"""
+        response = self.app.post('/debug/tracemalloc/snapshots')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.app.post('/debug/tracemalloc/snapshots',
+                                 headers={'X-Instrumentation-Token': 'wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_tracemalloc_disabled_without_token(self):
+        """Test that tracemalloc endpoints are hidden when no token is configured"""
+        with mock.patch.object(app_config, 'INSTRUMENTATION_TOKEN', None):
+            response = self.app.post('/debug/tracemalloc/snapshots', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_tracemalloc_snapshot_and_diff(self):
+        """Test taking two snapshots and diffing them"""
+        response = self.app.post('/debug/tracemalloc/snapshots', headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        start = json.loads(response.data)
+        self.assertTrue(start['snapshot_id'].startswith(f'{os.getpid()}-'))
+        self.assertIn('top', start)
+
+        retained = [str(i) * 10 for i in range(1000)]
+        response = self.app.post('/debug/tracemalloc/snapshots', headers=self.headers)
+        end = json.loads(response.data)
+
+        response = self.app.get(
+            f"/debug/tracemalloc/diff?start={start['snapshot_id']}&end={end['snapshot_id']}",
+            headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['start'], start['snapshot_id'])
+        self.assertEqual(data['end'], end['snapshot_id'])
+        self.assertGreater(data['size_diff_bytes'], 0)
+        self.assertIn('top', data)
+        del retained
+
+    def test_tracemalloc_diff_errors(self):
+        """Test diff validation for missing and unknown snapshot ids"""
+        response = self.app.get('/debug/tracemalloc/diff', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.app.get(f'/debug/tracemalloc/diff?start={os.getpid()}-9999&end={os.getpid()}-10000',
+                                headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_tracemalloc_diff_rejects_other_process_ids(self):
+        """Test that snapshot ids owned by another worker process return 404"""
+        response = self.app.post('/debug/tracemalloc/snapshots', headers=self.headers)
+        own_id = json.loads(response.data)['snapshot_id']
+        sequence = own_id.split('-', 1)[1]
+        other_id = f'{os.getpid() + 1}-{sequence}'
+
+        response = self.app.get(f'/debug/tracemalloc/diff?start={other_id}&end={own_id}',
+                                headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_tracemalloc_snapshot_limit_bounds(self):
+        """Test that snapshot limits outside 1..100 are rejected"""
+        for limit in ['0', '-5', '101', '100000']:
+            with self.subTest(limit=limit):
+                response = self.app.post(f'/debug/tracemalloc/snapshots?limit={limit}',
+                                         headers=self.headers)
+                self.assertEqual(response.status_code, 400)
+
+        response = self.app.post('/debug/tracemalloc/snapshots?limit=1', headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertLessEqual(len(json.loads(response.data)['top']), 1)
+
+    def test_tracemalloc_diff_limit_bounds(self):
+        """Test that diff limits outside 1..100 are rejected"""
+        start = json.loads(self.app.post('/debug/tracemalloc/snapshots', headers=self.headers).data)
+        end = json.loads(self.app.post('/debug/tracemalloc/snapshots', headers=self.headers).data)
+        query = f"start={start['snapshot_id']}&end={end['snapshot_id']}"
+
+        for limit in ['0', '-5', '101', '100000']:
+            with self.subTest(limit=limit):
+                response = self.app.get(f'/debug/tracemalloc/diff?{query}&limit={limit}',
+                                        headers=self.headers)
+                self.assertEqual(response.status_code, 400)
+
+        response = self.app.get(f'/debug/tracemalloc/diff?{query}&limit=2', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(json.loads(response.data)['top']), 2)
+
+    def test_tracemalloc_frames_must_be_positive(self):
+        """Test that an invalid TRACEMALLOC_FRAMES fails at construction"""
+        for frames in [0, -1]:
+            with self.subTest(frames=frames):
+                with self.assertRaisesRegex(ValueError, 'TRACEMALLOC_FRAMES'):
+                    RuntimeInstrumentation(tracemalloc_frames=frames)
+
+    def test_tracemalloc_concurrent_snapshot_and_stop(self):
+        """Test that snapshots racing with stop never fail"""
+        errors = []
+
+        def snapshot_loop():
+            try:
+                for _ in range(20):
+                    runtime_instrumentation.take_snapshot(limit=1)
+            except Exception as e:
+                errors.append(e)
+
+        def stop_loop():
+            for _ in range(20):
+                runtime_instrumentation.stop_tracing()
+
+        threads = [threading.Thread(target=snapshot_loop), threading.Thread(target=stop_loop)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_tracemalloc_stop(self):
+        """Test that stopping tracemalloc clears snapshots"""
+        self.app.post('/debug/tracemalloc/snapshots', headers=self.headers)
+        response = self.app.delete('/debug/tracemalloc', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        runtime = json.loads(self.app.get('/metrics').data)['runtime']
+        self.assertFalse(runtime['tracemalloc']['tracing'])
+        self.assertEqual(runtime['tracemalloc']['snapshots'], [])
+
+class BatchStatusTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def test_batch_matches_individual_endpoints(self):
+        """Test that batched payloads match the standalone endpoints"""
+        response = self.app.get('/batch?routes=/health,/config,/ssl-status')
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertIn('timestamp', data)
+        self.assertEqual(sorted(data['results']), ['/config', '/health', '/ssl-status'])
+        for route, result in data['results'].items():
+            with self.subTest(route=route):
+                expected = json.loads(self.app.get(route).data)
+                expected.pop('timestamp')
+                self.assertEqual(result['status_code'], 200)
+                self.assertEqual(result['data'], expected)
+                self.assertNotIn('timestamp', result['data'])
+
+    def test_batch_defaults_to_all_routes(self):
+        """Test that omitting routes returns every batchable endpoint"""
+        response = self.app.get('/batch')
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertEqual(
+            sorted(data['results']),
+            ['/config', '/health', '/metrics', '/security-headers', '/ssl-status']
+        )
+        self.assertEqual(data['results']['/metrics']['data']['uptime'], 'running')
+
+    def test_batch_accepts_repeated_route_names(self):
+        """Test repeated query parameters and names without a leading slash"""
+        response = self.app.get('/batch?routes=health&routes=metrics')
+        data = json.loads(response.data)
+        self.assertEqual(sorted(data['results']), ['/health', '/metrics'])
+
+    def test_batch_rejects_unsupported_routes(self):
+        """Test that non read-only or unknown routes are rejected"""
+        for route in ['/', '/force-https-test', '/debug/tracemalloc', '/nonexistent']:
+            with self.subTest(route=route):
+                response = self.app.get(f'/batch?routes=/health,{route}')
+                self.assertEqual(response.status_code, 400)
+                data = json.loads(response.data)
+                self.assertEqual(data['status'], 'error')
+
+    def test_batch_reports_handler_status(self):
+        """Test that a non-200 handler response is reported per route"""
+        with mock.patch.object(app_config, 'HEALTH_CHECK_ENABLED', False):
+            response = self.app.get('/batch?routes=/health,/config')
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertEqual(data['results']['/health']['status_code'], 503)
+        self.assertEqual(data['results']['/health']['data']['status'], 'disabled')
+        self.assertEqual(data['results']['/config']['status_code'], 200)
+
+    def test_batch_logs_single_record(self):
+        """Test that per-handler log records are folded into the batch record"""
+        with self.assertLogs(level='INFO') as logs:
+            self.app.get('/batch?routes=/health,/metrics,/config,/ssl-status')
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            ['Incoming request', 'Batch status requested', 'Response sent']
+        )
+
+def http_get(sock, path):
+    """Send a minimal HTTP/1.0 GET over a connected socket and return the raw response"""
+    sock.sendall(f'GET {path} HTTP/1.0\r\nHost: localhost\r\n\r\n'.encode())
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    sock.close()
+    return b''.join(chunks)
+
+class ServerListenerTestCase(unittest.TestCase):
+    def start_server(self, sock, host, port):
+        server = make_socket_server(app, sock, host, port)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(sock.close)
+        self.addCleanup(server.shutdown)
+
+    def make_temp_dir(self):
+        """Create a temporary directory removed when the test finishes"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        return temp_dir.name
+
+    def test_unix_socket_listener(self):
+        """Test serving the app over a Unix domain socket"""
+        path = os.path.join(self.make_temp_dir(), 'run', 'app.sock')
+        sock = create_unix_listener(path, mode=0o600)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        self.start_server(sock, f'unix://{path}', 0)
+
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+        response = http_get(client, '/health')
+        self.assertIn(b'200 OK', response.split(b'\r\n', 1)[0])
+        self.assertIn(b'"status":"healthy"', response.replace(b' ', b''))
+
+    def test_unix_socket_replaces_stale_file(self):
+        """Test that a leftover socket file does not prevent binding"""
+        path = os.path.join(self.make_temp_dir(), 'app.sock')
+        create_unix_listener(path).close()
+        self.assertTrue(os.path.exists(path))
+        sock = create_unix_listener(path)
+        self.addCleanup(sock.close)
+        self.assertEqual(sock.getsockname(), path)
+
+    def test_unix_socket_refuses_regular_file(self):
+        """Test that a non-socket file at the socket path is left alone"""
+        path = os.path.join(self.make_temp_dir(), 'app.sock')
+        with open(path, 'w') as f:
+            f.write('not a socket')
+
+        with self.assertRaises(FileExistsError):
+            create_unix_listener(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), 'not a socket')
+
+    def test_unix_socket_refuses_live_socket(self):
+        """Test that the socket of a running server is not taken over"""
+        path = os.path.join(self.make_temp_dir(), 'app.sock')
+        live = create_unix_listener(path)
+        self.addCleanup(live.close)
+
+        with self.assertRaises(FileExistsError):
+            create_unix_listener(path)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.connect(path)
+
+    @unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), 'SO_REUSEPORT not available')
+    def test_reuseport_listeners_share_port(self):
+        """Test that several SO_REUSEPORT listeners bind the same port and serve"""
+        first = create_reuseport_listener('127.0.0.1', 0)
+        port = first.getsockname()[1]
+        second = create_reuseport_listener('127.0.0.1', port)
+        self.assertEqual(second.getsockname()[1], port)
+        self.assertTrue(second.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT))
+        self.start_server(first, '127.0.0.1', port)
+        self.start_server(second, '127.0.0.1', port)
+
+        for _ in range(4):
+            client = socket.create_connection(('127.0.0.1', port))
+            response = http_get(client, '/health')
+            self.assertIn(b'200 OK', response.split(b'\r\n', 1)[0])
+
+    @unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), 'SO_REUSEPORT not available')
+    def test_reuseport_worker_crash_fails_server(self):
+        """Test that a crashed worker stops the others and raises"""
+        def crash(*args, **kwargs):
+            raise OSError('worker crashed')
+
+        with mock.patch('server.serve_socket', side_effect=crash):
+            with self.assertLogs('server', level='ERROR') as logs:
+                with self.assertRaisesRegex(RuntimeError, 'exit code 1'):
+                    serve_reuseport(app, '127.0.0.1', 0, workers=2)
+
+        self.assertIn('SO_REUSEPORT worker failed', [record.getMessage() for record in logs.records])
+        self.assertEqual(logs.records[0].exit_code, 1)
+
+    @unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), 'SO_REUSEPORT not available')
+    def test_reuseport_worker_killed_by_signal_fails_server(self):
+        """Test that a worker killed by a signal is reported as a failure"""
+        def killed(*args, **kwargs):
+            os.kill(os.getpid(), signal.SIGKILL)
+
+        with mock.patch('server.serve_socket', side_effect=killed):
+            with self.assertLogs('server', level='ERROR'):
+                with self.assertRaisesRegex(RuntimeError, f'exit code {-signal.SIGKILL}'):
+                    serve_reuseport(app, '127.0.0.1', 0, workers=1)
+
+    def test_default_worker_count_uses_affinity(self):
+        """Test that the worker default follows the CPU affinity mask"""
+        from config import default_worker_count
+        if hasattr(os, 'sched_getaffinity'):
+            with mock.patch('os.sched_getaffinity', return_value={0, 1}):
+                self.assertEqual(default_worker_count(), 2)
+        self.assertGreaterEqual(default_worker_count(), 1)
+
+    def test_unknown_server_mode(self):
+        """Test that an invalid SERVER_MODE is rejected"""
+        with mock.patch.object(app_config, 'SERVER_MODE', 'bogus'):
+            with self.assertRaises(ValueError):
+                serve(app, app_config)
+
 if __name__ == '__main__':
     unittest.main()